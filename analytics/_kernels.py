@@ -0,0 +1,105 @@
+import numpy as np
+
+# Numba is optional: when it is installed the kernels below are compiled
+# eagerly (explicit signatures) at import time, otherwise the NumPy
+# fallbacks are used.
+try:
+    from numba import njit, prange, types
+except ImportError:
+    njit = None
+
+
+# Attrition score
+
+def _attrition_score_numpy(sat, hours, compl, on_time, out):
+    np.clip(
+        0.45 * ((5.0 - sat) / 4.0)
+        + 0.25 * np.clip((hours - 45.0) / 20.0, 0, 1)
+        + 0.20 * np.clip(1.0 - compl, 0, 1)
+        + 0.10 * np.clip(1.0 - on_time, 0, 1),
+        0, 1, out=out,
+    )
+
+
+if njit is not None:
+
+    # Inputs may be read-only views of pandas columns (copy-on-write).
+    _ro_vec = types.Array(types.float64, 1, "C", readonly=True)
+
+    # No fastmath: the sum must be evaluated in the same order as the
+    # NumPy version so both paths round identically.
+    @njit(
+        types.void(_ro_vec, _ro_vec, _ro_vec, _ro_vec, types.float64[::1]),
+        parallel=True,
+        cache=True,
+    )
+    def _attrition_score_jit(sat, hours, compl, on_time, out):
+        for i in prange(sat.size):
+            p = (
+                0.45 * ((5.0 - sat[i]) / 4.0)
+                + 0.25 * min(max((hours[i] - 45.0) / 20.0, 0.0), 1.0)
+                + 0.20 * min(max(1.0 - compl[i], 0.0), 1.0)
+                + 0.10 * min(max(1.0 - on_time[i], 0.0), 1.0)
+            )
+            out[i] = min(max(p, 0.0), 1.0)
+
+else:
+    _attrition_score_jit = None
+
+
+def attrition_score(sat, hours, compl, on_time):
+    """
+    Heuristic attrition probability (0–1) per employee.
+
+    Takes the per-employee average satisfaction, weekly hours, project
+    completion rate and on-time rate as 1-D arrays of equal length.
+    """
+    arrays = [
+        np.ascontiguousarray(a, dtype=np.float64)
+        for a in (sat, hours, compl, on_time)
+    ]
+    out = np.empty_like(arrays[0])
+
+    if _attrition_score_jit is not None:
+        _attrition_score_jit(*arrays, out)
+    else:
+        _attrition_score_numpy(*arrays, out)
+
+    return out
+
+
+# Risk bucket counts
+
+def _risk_counts_numpy(probs, medium, high):
+    probs = probs[~np.isnan(probs)]
+    codes = np.searchsorted([medium, high], probs, side="right")
+    return np.bincount(codes, minlength=3).astype(np.int64)
+
+
+if njit is not None:
+
+    @njit(types.int64[::1](_ro_vec, types.float64, types.float64), cache=True)
+    def _risk_counts_jit(probs, medium, high):
+        counts = np.zeros(3, dtype=np.int64)
+        for i in range(probs.size):
+            p = probs[i]
+            if np.isnan(p):
+                continue
+            counts[(p >= medium) + (p >= high)] += 1
+        return counts
+
+else:
+    _risk_counts_jit = None
+
+
+def risk_counts(probs, medium, high):
+    """
+    Number of Low / Medium / High attrition probabilities in one pass, with
+    the same cut-offs as the ETL's risk_level (Low < medium <= Medium < high
+    <= High). NaN values are not counted.
+    """
+    probs = np.ascontiguousarray(probs, dtype=np.float64)
+
+    if _risk_counts_jit is not None:
+        return _risk_counts_jit(probs, medium, high)
+    return _risk_counts_numpy(probs, medium, high)
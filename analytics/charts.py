@@ -0,0 +1,127 @@
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+
+from analytics.etl import PROC_DIR
+from analytics.plotly_utils import (create_department_productivity_chart,
+                                    create_department_satisfaction_chart,
+                                    create_hours_heatmap,
+                                    create_productivity_chart,
+                                    create_risk_distribution_chart,
+                                    create_survey_breakdown_chart)
+
+# Dashboard charts that depend only on the ETL output and the department
+# filter. run_etl_pipeline renders them once per department into
+# CHART_DIR; the views build them live with the same functions when a
+# payload is missing.
+
+CHART_DIR = PROC_DIR / "charts"
+
+# File key of the unfiltered variant (department names are URL-quoted)
+ALL_DEPARTMENTS = "__all__"
+
+PRODUCTIVITY_CHARTS = ("productivity_trend", "productivity_by_department", "hours_heatmap")
+ENGAGEMENT_CHARTS = ("department_satisfaction", "survey_breakdown")
+ATTRITION_CHARTS = ("risk_distribution",)
+
+
+def chart_path(name: str, department: str | None = None) -> Path:
+    """Where the payload of chart `name` for `department` is stored."""
+    key = quote(department, safe="") if department else ALL_DEPARTMENTS
+    return CHART_DIR / name / f"{key}.json"
+
+
+# Aggregates
+
+def department_map(employees: pd.DataFrame) -> pd.Series:
+    """
+    employee_id -> department lookup, built once and shared by the charts.
+    Repeated employee_ids keep their first row, since Series.map needs a
+    unique index.
+    """
+    return employees.drop_duplicates("employee_id").set_index("employee_id")["department"]
+
+
+def productivity_by_department(weekly: pd.DataFrame, dept_map: pd.Series) -> pd.DataFrame:
+    """Mean productivity_ratio per department, as a frame for the bar chart."""
+    # map employee -> department, no merge
+    weekly_dept = weekly["employee_id"].map(dept_map).rename("department")
+    return (
+        weekly["productivity_ratio"]
+        .groupby(weekly_dept, observed=True)
+        .mean()
+        .reset_index()
+    )
+
+
+def satisfaction_by_department(satisfaction: pd.DataFrame, dept_map: pd.Series) -> pd.DataFrame:
+    """Mean avg_satisfaction per department (departments without any dropped)."""
+    # map employee -> department, no merge
+    sat_dept = satisfaction["employee_id"].map(dept_map).rename("department")
+    return (
+        satisfaction["avg_satisfaction"]
+        .groupby(sat_dept, observed=True)
+        .mean()
+        .reset_index()
+        .dropna()
+    )
+
+
+def question_scores(survey: pd.DataFrame) -> pd.DataFrame:
+    """Mean numeric_response per survey question."""
+    return (
+        survey.groupby("question", observed=True)["numeric_response"]
+        .mean()
+        .reset_index()
+    )
+
+
+def risk_distribution(kpis: dict) -> pd.DataFrame:
+    """Low/Medium/High counts from the KPI snapshot, as a frame for the pie."""
+    return pd.DataFrame({
+        "Risk Level": ["Low", "Medium", "High"],
+        "Count": [
+            kpis.get("low_risk_count") or 0,
+            kpis.get("medium_risk_count") or 0,
+            kpis.get("high_risk_count") or 0,
+        ],
+    })
+
+
+# Chart payloads (None when there is nothing to plot)
+
+def productivity_charts(weekly: pd.DataFrame | None, dept_map: pd.Series | None) -> dict:
+    charts = dict.fromkeys(PRODUCTIVITY_CHARTS)
+    if weekly is None or weekly.empty:
+        return charts
+
+    charts["productivity_trend"] = create_productivity_chart(weekly)
+    if dept_map is not None:
+        charts["productivity_by_department"] = create_department_productivity_chart(
+            productivity_by_department(weekly, dept_map)
+        )
+    charts["hours_heatmap"] = create_hours_heatmap(weekly)
+    return charts
+
+
+def engagement_charts(
+    dept_map: pd.Series | None,
+    satisfaction: pd.DataFrame | None,
+    survey: pd.DataFrame | None,
+) -> dict:
+    charts = dict.fromkeys(ENGAGEMENT_CHARTS)
+
+    if dept_map is not None and satisfaction is not None:
+        dept_df = satisfaction_by_department(satisfaction, dept_map)
+        if not dept_df.empty:
+            charts["department_satisfaction"] = create_department_satisfaction_chart(dept_df)
+
+    if survey is not None and not survey.empty:
+        charts["survey_breakdown"] = create_survey_breakdown_chart(question_scores(survey))
+
+    return charts
+
+
+def attrition_charts(kpis: dict) -> dict:
+    return {"risk_distribution": create_risk_distribution_chart(risk_distribution(kpis))}
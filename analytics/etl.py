@@ -1,39 +1,290 @@
+import json
 import os
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 
+from analytics._kernels import attrition_score, risk_counts
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 RAW_DIR = BASE_DIR / "data" / "raw"
 PROC_DIR = BASE_DIR / "data" / "processed"
 
+# Attrition probability cut-offs for the stored risk_level buckets, used
+# by every dashboard: Low < MEDIUM_RISK_THRESHOLD <= Medium < HIGH_RISK_THRESHOLD <= High
+MEDIUM_RISK_THRESHOLD = 0.35
+HIGH_RISK_THRESHOLD = 0.55
+
 # Helpers
 
-def _load_csv(name: str, folder: Path = RAW_DIR) -> pd.DataFrame | None:
+# Dtypes for the raw inputs. Columns missing from a file are ignored by
+# read_csv. employee_id / project_id are left to inference since IDs are
+# not guaranteed to be numeric. Label columns are categorical; the
+# measures stay float64, since the sums and means over them feed the
+# attrition probabilities and float32 would shift those across the
+# rounding (and risk) boundaries.
+DTYPES = {
+    "employees": {
+        "department": "category",
+        "role": "category",
+    },
+    "survey_responses": {
+        "question": "category",
+        "numeric_response": "float64",
+    },
+    "time_tracking": {
+        "hours_logged": "float64",
+        "billable_hours": "float64",
+    },
+}
+
+
+def _load_csv(
+    name: str,
+    folder: Path = RAW_DIR,
+    dtype: dict | None = None,
+    parse_dates: list[str] | None = None,
+) -> pd.DataFrame | None:
     """Load a CSV by basename (without .csv). Returns None if missing."""
     path = folder / f"{name}.csv"
     if not path.exists():
         return None
-    return pd.read_csv(path)
 
+    if parse_dates:
+        # Only parse the date columns that exist, so missing columns still
+        # surface through the pipeline's own KeyError checks.
+        header = pd.read_csv(path, nrows=0).columns
+        parse_dates = [c for c in parse_dates if c in header]
+
+    # pyarrow's multi-threaded parser; pyarrow is already required for the
+    # Parquet output. Columns stay NumPy-backed (default dtype_backend).
+    return pd.read_csv(
+        path, engine="pyarrow", dtype=dtype, parse_dates=parse_dates or None
+    )
+
+
+def _replace(path: Path, write) -> None:
+    """
+    Call write(tmp) on a temp file next to `path`, then rename it into
+    place, so the views (which may be serving pages while the ETL runs)
+    never read a half-written file.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
 
-def _save_csv(df: pd.DataFrame, name: str, folder: Path = PROC_DIR) -> None:
-    """Save DF to processed folder, creating the folder if needed."""
+
+def _save_processed(df: pd.DataFrame, name: str, folder: Path = PROC_DIR) -> None:
+    """Save DF as Parquet to processed folder, creating the folder if needed."""
     folder.mkdir(parents=True, exist_ok=True)
-    path = folder / f"{name}.csv"
-    df.to_csv(path, index=False)
+    _replace(
+        folder / f"{name}.parquet",
+        lambda tmp: df.to_parquet(tmp, engine="pyarrow", compression="zstd", index=False),
+    )
+
+def _seg_mean(keys: pd.Series, **columns: pd.Series) -> pd.DataFrame:
+    """
+    Per-key means of `columns` (NaNs skipped, like groupby().mean()).
+
+    Keys are factorized and sorted once; each column is then reduced per
+    segment with np.add.reduceat. Returns one row per key with the key
+    column plus one column per keyword argument.
+    """
+    codes, uniques = pd.factorize(keys)  # NaN keys -> -1, dropped like groupby
+    rows = np.flatnonzero(codes >= 0)
+    order = rows[np.argsort(codes[rows], kind="stable")]
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    if not len(order):
+        starts = starts[:0]
+
+    out = {keys.name: uniques.take(sorted_codes[starts])}
+    for name, col in columns.items():
+        values = col.to_numpy(np.float64)[order]
+        valid = ~np.isnan(values)
+        sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        counts = np.add.reduceat(valid.astype(np.int64), starts)
+        out[name] = np.divide(
+            sums, counts, out=np.full(len(starts), np.nan), where=counts > 0
+        )
+
+    return pd.DataFrame(out)
+
+
+def _iso_year_week(dates: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    ISO-8601 (year, week) as int32 arrays, computed on the datetime64
+    values directly instead of building the dt.isocalendar() frame.
+    """
+    days = dates.to_numpy("datetime64[D]")
+    if np.isnat(days).any():
+        raise ValueError("time_tracking.csv contains missing or unparseable dates")
+
+    # The ISO week belongs to the year of its Thursday (weeks start Monday;
+    # 1970-01-01 was a Thursday).
+    day_num = days.astype(np.int64)
+    thursday = days - ((day_num + 3) % 7) + 3
+    year_start = thursday.astype("datetime64[Y]")
+    week = (thursday - year_start.astype("datetime64[D]")).astype(np.int64) // 7 + 1
+
+    year = year_start.astype(np.int64) + 1970
+    return year.astype(np.int32), week.astype(np.int32)
+
+
+def _save_json(obj: dict, name: str, folder: Path = PROC_DIR) -> None:
+    """Save a small JSON document to processed folder."""
+    folder.mkdir(parents=True, exist_ok=True)
+    _replace(
+        folder / f"{name}.json",
+        lambda tmp: tmp.write_text(json.dumps(obj, indent=2), encoding="utf-8"),
+    )
+
+
+def _mean(s: pd.Series) -> float | None:
+    """Mean as a plain float, or None when there is nothing to average."""
+    value = s.mean()
+    return None if pd.isna(value) else float(value)
+
+
+def _kpi_summary(
+    emp_sat: pd.DataFrame,
+    weekly: pd.DataFrame,
+    projects: pd.DataFrame,
+    attr: pd.DataFrame,
+) -> dict:
+    """KPIs shared by the overall snapshot and the per-department table."""
+    low, medium, high = (
+        int(n) for n in risk_counts(
+            attr["attrition_probability"].to_numpy(),
+            MEDIUM_RISK_THRESHOLD,
+            HIGH_RISK_THRESHOLD,
+        )
+    )
+    high_risk_pct = round(high / len(attr) * 100, 1) if len(attr) else 0.0
+
+    return {
+        "avg_satisfaction": _mean(emp_sat["avg_satisfaction"]),
+        "avg_productivity": _mean(weekly["productivity_ratio"]),
+        "avg_hours": _mean(weekly["hours_logged"]),
+        "project_completion": _mean(projects["is_completed"]),
+        "on_time_rate": _mean(projects["on_time"]),
+        "low_risk_count": low,
+        "medium_risk_count": medium,
+        "high_risk_count": high,
+        "high_risk_pct": high_risk_pct,
+    }
+
+
+def _compute_kpis(
+    employees: pd.DataFrame,
+    projects: pd.DataFrame,
+    emp_sat: pd.DataFrame,
+    weekly: pd.DataFrame,
+    attr: pd.DataFrame,
+) -> tuple[dict, pd.DataFrame]:
+    """
+    Dashboard KPIs, overall (dict) and per department (one row each),
+    computed the same way the views would on the filtered tables.
+    """
+    departments_list = sorted(employees["department"].dropna().unique().tolist())
+
+    kpis = {
+        "employee_count": int(len(employees)),
+        "departments": len(departments_list),
+        "departments_list": departments_list,
+        "active_projects": int(
+            projects.loc[projects["is_completed"] == 0, "project_id"].nunique()
+        ),
+        **_kpi_summary(emp_sat, weekly, projects, attr),
+    }
+
+    rows = []
+    for dept in employees["department"].dropna().unique():
+        ids = employees.loc[employees["department"] == dept, "employee_id"].to_numpy()
+        rows.append({
+            "department": dept,
+            "employee_count": int(len(ids)),
+            **_kpi_summary(
+                emp_sat[emp_sat["employee_id"].isin(ids)],
+                weekly[weekly["employee_id"].isin(ids)],
+                projects[projects["employee_id"].isin(ids)],
+                attr[attr["department"] == dept],
+            ),
+        })
+
+    return kpis, pd.DataFrame(rows)
+
+def _save_charts(
+    employees: pd.DataFrame,
+    weekly: pd.DataFrame,
+    emp_sat: pd.DataFrame,
+    survey: pd.DataFrame,
+    kpis: dict,
+    kpis_by_dept: pd.DataFrame,
+) -> None:
+    """
+    Render the dashboards' department-filterable charts once per department
+    (plus the unfiltered variant). A chart with nothing to plot is written
+    as an empty file.
+
+    The views may be reading these files meanwhile, so each payload is
+    replaced atomically, and only payloads this run did not produce (e.g.
+    of removed departments) are deleted.
+    """
+    from analytics import charts
+
+    written = set()
+    dept_kpis = {row["department"]: row for row in kpis_by_dept.to_dict("records")}
+    dept_map = charts.department_map(employees)
+
+    for dept in [None, *kpis["departments_list"]]:
+        if dept is None:
+            dept_weekly, dept_sat, dept_survey, dept_kpi = weekly, emp_sat, survey, kpis
+        else:
+            ids = employees.loc[employees["department"] == dept, "employee_id"].to_numpy()
+            dept_weekly = weekly[weekly["employee_id"].isin(ids)]
+            dept_sat = emp_sat[emp_sat["employee_id"].isin(ids)]
+            dept_survey = survey[survey["employee_id"].isin(ids)]
+            dept_kpi = dept_kpis.get(dept, {})
+
+        payloads = {
+            **charts.productivity_charts(dept_weekly, dept_map),
+            **charts.engagement_charts(dept_map, dept_sat, dept_survey),
+            **charts.attrition_charts(dept_kpi),
+        }
+        for name, payload in payloads.items():
+            path = charts.chart_path(name, dept)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _replace(path, lambda tmp: tmp.write_text(payload or "", encoding="utf-8"))
+            written.add(path)
+
+    for path in charts.CHART_DIR.glob("*/*.json"):
+        if path not in written:
+            path.unlink(missing_ok=True)
 
 # Core ETL
 
-def run_etl_pipeline() -> bool:
+def run_etl_pipeline(sql_engine=None) -> bool:
+    """
+    Rebuild data/processed from data/raw. With `sql_engine` (a SQLAlchemy
+    engine, e.g. analytics.queries.get_engine()), attrition_data is also
+    mirrored into that database once every file output has been written,
+    tagged with the mtime of attrition_data.parquet; the views ignore a
+    mirror whose tag no longer matches the file.
+    """
     
     # 1. Load RAW datasets
     
-    employees = _load_csv("employees")
+    employees = _load_csv("employees", dtype=DTYPES["employees"])
     projects = _load_csv("project_data")
-    survey = _load_csv("survey_responses")
-    time_tracking = _load_csv("time_tracking")
+    survey = _load_csv("survey_responses", dtype=DTYPES["survey_responses"])
+    time_tracking = _load_csv(
+        "time_tracking", dtype=DTYPES["time_tracking"], parse_dates=["date"]
+    )
 
     
     if employees is None or projects is None or survey is None or time_tracking is None:
@@ -42,11 +293,12 @@ def run_etl_pipeline() -> bool:
             "(employees, project_data, survey_responses, time_tracking)."
         )
 
-    # Copy raw → processed (so views always read from processed/)
-    _save_csv(employees, "employees")
-    _save_csv(projects, "project_data")
-    _save_csv(survey, "survey_responses")
-    _save_csv(time_tracking, "time_tracking")
+    # Raw inputs are no longer copied into processed/ (the views fall back
+    # to data/raw). Remove copies left by older runs so they can't shadow
+    # newer raw files.
+    for name in ("employees", "project_data", "survey_responses", "time_tracking"):
+        for ext in ("parquet", "csv"):
+            (PROC_DIR / f"{name}.{ext}").unlink(missing_ok=True)
 
     
     if "employee_id" not in employees.columns:
@@ -62,7 +314,7 @@ def run_etl_pipeline() -> bool:
         raise KeyError("time_tracking.csv must contain an 'employee_id' column")
 
     
-    # 2. EMPLOYEE SATISFACTION (employee_satisfaction.csv)
+    # 2. EMPLOYEE SATISFACTION (employee_satisfaction.parquet)
     
     if "numeric_response" in survey.columns:
         score_col = "numeric_response"
@@ -74,20 +326,21 @@ def run_etl_pipeline() -> bool:
         score_col = "numeric_response"
 
     emp_sat = (
-        survey.groupby("employee_id")[score_col]
+        survey.groupby("employee_id", sort=False)[score_col]
         .mean()
         .reset_index()
         .rename(columns={score_col: "avg_satisfaction"})
     )
 
-    _save_csv(emp_sat, "employee_satisfaction")
+    _save_processed(emp_sat, "employee_satisfaction")
 
     
-    # 3. WEEKLY TIME AGGREGATION (weekly_time.csv)
+    # 3. WEEKLY TIME AGGREGATION (weekly_time.parquet)
     
     if "date" not in time_tracking.columns:
         raise KeyError("time_tracking.csv must contain a 'date' column")
 
+    # No-op when read_csv already parsed the column
     time_tracking["date"] = pd.to_datetime(time_tracking["date"])
 
     
@@ -98,12 +351,10 @@ def run_etl_pipeline() -> bool:
         time_tracking["billable_hours"] = time_tracking["hours_logged"]
 
     
-    iso = time_tracking["date"].dt.isocalendar()
-    time_tracking["year"] = iso["year"].astype(int)
-    time_tracking["week"] = iso["week"].astype(int)
+    time_tracking["year"], time_tracking["week"] = _iso_year_week(time_tracking["date"])
 
     weekly_agg = (
-        time_tracking.groupby(["employee_id", "year", "week"])
+        time_tracking.groupby(["employee_id", "year", "week"], sort=False)
         .agg(
             hours_logged=("hours_logged", "sum"),
             billable_hours=("billable_hours", "sum"),
@@ -112,32 +363,38 @@ def run_etl_pipeline() -> bool:
     )
 
     
-    weekly_agg["productivity_ratio"] = (
-        weekly_agg["billable_hours"] / weekly_agg["hours_logged"].replace(0, np.nan)
-    ).fillna(0.0)
+    # billable / logged, with 0 for weeks without logged hours
+    billable = weekly_agg["billable_hours"].to_numpy(np.float64)
+    logged = weekly_agg["hours_logged"].to_numpy(np.float64)
+    weekly_agg["productivity_ratio"] = np.divide(
+        billable, logged, out=np.zeros_like(billable), where=logged != 0
+    )
 
     
     weekly_agg["activity_percentage"] = (
         weekly_agg["hours_logged"] / 40.0 * 100.0
     ).clip(0, 300)
 
-    _save_csv(weekly_agg, "weekly_time")
+    # Chronological integer week key for the trend chart, so the view
+    # neither rebuilds it nor formats per-row labels
+    weekly_agg["year_week"] = (
+        weekly_agg["year"].to_numpy(np.int32) * 100 + weekly_agg["week"].to_numpy(np.int32)
+    )
+
+    _save_processed(weekly_agg, "weekly_time")
 
 
-    # 4. HEURISTIC ATTRITION DATA (attrition_data.csv)
+    # 4. HEURISTIC ATTRITION DATA (attrition_data.parquet)
     
     # 4a. Merge satisfaction
     attr = employees.copy()
     attr = attr.merge(emp_sat, on="employee_id", how="left")
 
     # 4b. Avg weekly hours + productivity per employee
-    emp_time_agg = (
-        weekly_agg.groupby("employee_id")
-        .agg(
-            avg_hours=("hours_logged", "mean"),
-            avg_productivity=("productivity_ratio", "mean"),
-        )
-        .reset_index()
+    emp_time_agg = _seg_mean(
+        weekly_agg["employee_id"],
+        avg_hours=weekly_agg["hours_logged"],
+        avg_productivity=weekly_agg["productivity_ratio"],
     )
     attr = attr.merge(emp_time_agg, on="employee_id", how="left")
 
@@ -154,15 +411,13 @@ def run_etl_pipeline() -> bool:
         # If missing, assume all are on time
         projects["on_time"] = 1
 
-    proj_agg = (
-        projects.groupby("employee_id")
-        .agg(
-            total_projects=("project_id", "nunique"),
-            completion_rate=("is_completed", "mean"),
-            on_time_rate=("on_time", "mean"),
-        )
-        .reset_index()
+    proj_agg = _seg_mean(
+        projects["employee_id"],
+        completion_rate=projects["is_completed"],
+        on_time_rate=projects["on_time"],
     )
+    total_projects = projects.groupby("employee_id", sort=False)["project_id"].nunique()
+    proj_agg["total_projects"] = total_projects.reindex(proj_agg["employee_id"]).to_numpy()
     attr = attr.merge(proj_agg, on="employee_id", how="left")
 
     # Fill NaNs with reasonable defaults
@@ -199,36 +454,28 @@ def run_etl_pipeline() -> bool:
     # 4e. Heuristic attrition probability (0–1)
     
     
-    sat_component = (5.0 - attr["avg_satisfaction"]) / 4.0  # 0–1
-
-    
-    hours_component = (attr["avg_hours"] - 45.0) / 20.0
-    hours_component = hours_component.clip(0, 1)
-
-    
-    compl_component = (1.0 - attr["completion_rate"]).clip(0, 1)
-
-    
-    on_time_component = (1.0 - attr["on_time_rate"]).clip(0, 1)
-
-    attrition_prob = (
-        0.45 * sat_component
-        + 0.25 * hours_component
-        + 0.20 * compl_component
-        + 0.10 * on_time_component
-    ).clip(0, 1)
+    # Weighted satisfaction / overtime / incomplete / late-project
+    # components in one pass (Numba-compiled when available).
+    attrition_prob = attrition_score(
+        attr["avg_satisfaction"].to_numpy(np.float64),
+        attr["avg_hours"].to_numpy(np.float64),
+        attr["completion_rate"].to_numpy(np.float64),
+        attr["on_time_rate"].to_numpy(np.float64),
+    )
 
-    attr["attrition_probability"] = attrition_prob.round(3)
+    attr["attrition_probability"] = np.round(attrition_prob, 3)
 
-    
-    def _bucket(p: float) -> str:
-        if p >= 0.7:
-            return "High"
-        if p >= 0.4:
-            return "Medium"
-        return "Low"
 
-    attr["risk_level"] = attr["attrition_probability"].apply(_bucket)
+    # Computed once here so the views never re-bucket per request.
+    # searchsorted gives the bucket codes directly; NaN stays unbucketed (-1).
+    probs = attr["attrition_probability"].to_numpy()
+    codes = np.searchsorted(
+        [MEDIUM_RISK_THRESHOLD, HIGH_RISK_THRESHOLD], probs, side="right"
+    )
+    codes[np.isnan(probs)] = -1
+    attr["risk_level"] = pd.Categorical.from_codes(
+        codes, categories=["Low", "Medium", "High"]
+    )
 
     
     # 4f. Keep only relevant columns that actually exist
@@ -248,8 +495,40 @@ def run_etl_pipeline() -> bool:
         "risk_level",
     ]
     keep_cols = [c for c in desired_cols if c in attr.columns]
-    attr = attr[keep_cols]
+    attr = attr[keep_cols].copy()
+
+    # 4g. Compact dtypes before writing (Parquet keeps them for the views).
+    # attrition_probability stays float64: views compare it to decimal
+    # thresholds and float32 would shift values such as 0.35 across them.
+    for col in ["avg_satisfaction", "avg_hours", "avg_productivity",
+                "completion_rate", "on_time_rate"]:
+        attr[col] = pd.to_numeric(attr[col], downcast="float")
+
+    for col in ["department", "role", "risk_level"]:
+        if col in attr.columns:
+            attr[col] = attr[col].astype("category")
+
+    _save_processed(attr, "attrition_data")
+
+
+    # 5. KPI SNAPSHOT (kpis.json, kpis_by_dept.parquet)
 
-    _save_csv(attr, "attrition_data")
+    kpis, kpis_by_dept = _compute_kpis(employees, projects, emp_sat, weekly_agg, attr)
+    _save_json(kpis, "kpis")
+    _save_processed(kpis_by_dept, "kpis_by_dept")
+
+
+    # 6. PRE-RENDERED CHARTS (processed/charts/<chart>/<department>.json)
+
+    _save_charts(employees, weekly_agg, emp_sat, survey, kpis, kpis_by_dept)
+
+
+    # 7. SQL MIRROR (attrition_data table for the high-risk queries)
+
+    if sql_engine is not None:
+        from analytics.queries import write_attrition_table
+        write_attrition_table(
+            attr, sql_engine, version=os.stat(PROC_DIR / "attrition_data.parquet").st_mtime
+        )
 
     return True
@@ -1,8 +1,10 @@
+import json
+
 import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.offline import plot
+import plotly.io as pio
 
 # THEME COLORS
 
@@ -62,6 +64,27 @@ def create_base_layout():
     )
 
 
+# SERIALIZATION
+
+def to_chart_json(fig, config=None):
+    """
+    Serialize a figure for client-side rendering with Plotly.newPlot
+    (see the `plotly_chart` template tag). Returns a JSON string
+    {"figure": ..., "config": ...} with <, > and & escaped so it can be
+    embedded in a <script> element as-is.
+    """
+    config = {"responsive": True, **(config or {})}
+    payload = '{"figure": %s, "config": %s}' % (
+        pio.to_json(fig, validate=False),
+        json.dumps(config),
+    )
+    return (
+        payload.replace("<", "\\u003c")
+        .replace(">", "\\u003e")
+        .replace("&", "\\u0026")
+    )
+
+
 # EXISTING CHART FUNCTIONS 
 
 def create_productivity_chart(time_series_data):
@@ -70,14 +93,25 @@ def create_productivity_chart(time_series_data):
     Shows visible up/down trends + spacing.
     """
 
-    df = time_series_data.copy()
-    df["week_year"] = df["year"].astype(str) + "-W" + df["week"].astype(str)
+    df = time_series_data
+
+    # Group on an integer year*100 + week key (chronological order, no
+    # per-row strings); labels are only built for the aggregated weeks.
+    # The ETL stores the key as year_week; older files only have year/week.
+    if "year_week" in df.columns:
+        yw_key = df["year_week"].to_numpy()
+    else:
+        yw_key = df["year"].to_numpy(np.int32) * 100 + df["week"].to_numpy(np.int32)
 
     # USE MEAN instead of MEDIAN → restores real variation
-    weekly = df.groupby("week_year").agg({
+    weekly = df.groupby(yw_key).agg({
         "productivity_ratio": "mean",
         "activity_percentage": "mean",
-    }).reset_index()
+    }).rename_axis("yw_key").reset_index()
+
+    weekly["week_year"] = (
+        (weekly["yw_key"] // 100).astype(str) + "-W" + (weekly["yw_key"] % 100).astype(str)
+    )
 
     weekly["activity_norm"] = weekly["activity_percentage"] / 100
 
@@ -148,10 +182,8 @@ def create_productivity_chart(time_series_data):
         range=[y_min, y_max],  
     )
 
-    return plot(
+    return to_chart_json(
         fig,
-        output_type="div",
-        include_plotlyjs=False,
         config={"displayModeBar": False, "responsive": True},
     )
 
@@ -166,12 +198,10 @@ def create_department_risk_chart(dept_risk_data):
     )
 
     max_risk = dept_risk_data['Average Risk'].max()
-    colors = [
-        COLORS['green'] if x < 0.3 else
-        COLORS['yellow'] if x < 0.6 else
-        COLORS['red']
-        for x in dept_risk_data['Average Risk']
-    ]
+    # < 0.3 green, < 0.6 yellow, otherwise red
+    palette = np.array([COLORS['green'], COLORS['yellow'], COLORS['red']])
+    idx = np.searchsorted([0.3, 0.6], dept_risk_data['Average Risk'].to_numpy(), side='right')
+    colors = palette[idx].tolist()
 
     fig = go.Figure(layout=layout)
 
@@ -183,7 +213,7 @@ def create_department_risk_chart(dept_risk_data):
         textposition='auto'
     ))
 
-    return plot(fig, output_type='div', include_plotlyjs=False)
+    return to_chart_json(fig)
 
 
 def create_risk_distribution_chart(risk_distribution):
@@ -204,7 +234,7 @@ def create_risk_distribution_chart(risk_distribution):
         textfont=dict(color=COLORS['text'])
     ))
 
-    return plot(fig, output_type='div', include_plotlyjs=False)
+    return to_chart_json(fig)
 
 
 def create_survey_breakdown_chart(question_scores):
@@ -217,12 +247,10 @@ def create_survey_breakdown_chart(question_scores):
         yaxis=dict(categoryorder='total ascending')
     )
 
-    colors = [
-        COLORS['red'] if x < 3 else
-        COLORS['yellow'] if x < 4 else
-        COLORS['green']
-        for x in question_scores['numeric_response']
-    ]
+    # < 3 red, < 4 yellow, otherwise green
+    palette = np.array([COLORS['red'], COLORS['yellow'], COLORS['green']])
+    idx = np.searchsorted([3, 4], question_scores['numeric_response'].to_numpy(), side='right')
+    colors = palette[idx].tolist()
 
     fig = go.Figure(layout=layout)
 
@@ -241,7 +269,7 @@ def create_survey_breakdown_chart(question_scores):
         line=dict(color=COLORS['grid'], width=2, dash="dash")
     )
 
-    return plot(fig, output_type='div', include_plotlyjs=False)
+    return to_chart_json(fig)
 
 
 def create_employee_time_chart(employee_time):
@@ -283,7 +311,7 @@ def create_employee_time_chart(employee_time):
             line=dict(width=3, color=COLORS['yellow'])
         ))
 
-    return plot(fig, output_type='div', include_plotlyjs=False)
+    return to_chart_json(fig)
 
 
 # NEW CHARTS ADDED FOR FULL DASHBOARD SUPPORT
@@ -327,10 +355,8 @@ def create_department_productivity_chart(dept_df):
         range=[0, 1.0],
     )
 
-    return plot(
+    return to_chart_json(
         fig,
-        output_type="div",
-        include_plotlyjs=False,
         config={
             "displayModeBar": False,
             "responsive": True,
@@ -339,12 +365,23 @@ def create_department_productivity_chart(dept_df):
 
 
 def create_hours_heatmap(df):
-    pivot = df.pivot_table(
-        index="employee_id",
-        columns="week",
-        values="hours_logged",
-        aggfunc="mean"
-    )
+    """Heatmap: mean weekly hours per (employee, week)."""
+    # Same result as pivot_table(aggfunc="mean"), built with bincount
+    # over factorized keys instead of a MultiIndex groupby.
+    df = df[["employee_id", "week", "hours_logged"]].dropna()
+    emp_codes, emp_labels = pd.factorize(df["employee_id"], sort=True)
+    week_codes, week_labels = pd.factorize(df["week"], sort=True)
+
+    shape = (len(emp_labels), len(week_labels))
+    flat = emp_codes * shape[1] + week_codes
+    sums = np.bincount(flat, weights=df["hours_logged"].to_numpy(np.float64),
+                       minlength=shape[0] * shape[1])
+    counts = np.bincount(flat, minlength=sums.size)
+
+    # Cells without any logged week stay empty (NaN), as with pivot_table
+    z = np.full(sums.size, np.nan)
+    np.divide(sums, counts, out=z, where=counts > 0)
+    z = z.reshape(shape)
 
     layout = create_base_layout()
     layout.update(
@@ -357,13 +394,13 @@ def create_hours_heatmap(df):
     fig = go.Figure(layout=layout)
 
     fig.add_trace(go.Heatmap(
-        z=pivot.values,
-        x=pivot.columns,
-        y=pivot.index,
+        z=z,
+        x=week_labels,
+        y=emp_labels,
         colorscale="Blues"
     ))
 
-    return plot(fig, output_type="div", include_plotlyjs=False)
+    return to_chart_json(fig)
 
 
 def create_department_satisfaction_chart(dept_df):
@@ -382,4 +419,4 @@ def create_department_satisfaction_chart(dept_df):
         marker_color=COLORS["green"]
     ))
 
-    return plot(fig, output_type="div", include_plotlyjs=False)
+    return to_chart_json(fig)
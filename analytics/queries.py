@@ -0,0 +1,63 @@
+from functools import lru_cache
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from analytics.etl import HIGH_RISK_THRESHOLD
+
+# Aggregates that are answered by the analytics database
+# (settings.ANALYTICS_DB) instead of loading the full table into the
+# Django process. The ETL mirrors the tables queried here, tagged with the
+# mtime of the Parquet file they were written from.
+
+
+@lru_cache(maxsize=1)
+def get_engine():
+    """SQLAlchemy engine for settings.ANALYTICS_DB (created once)."""
+    from django.conf import settings
+
+    return create_engine(settings.ANALYTICS_DB)
+
+
+def write_attrition_table(attr, engine=None, version=None):
+    """
+    Replace the attrition_data table and index it for the queries below.
+    `version` (the mtime of the attrition_data.parquet it mirrors) is
+    stored last, so readers can tell when the table is out of date.
+    """
+    engine = engine or get_engine()
+    attr.to_sql("attrition_data", engine, if_exists="replace", index=False, chunksize=10_000)
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_attrition_dept_prob "
+            "ON attrition_data (department, attrition_probability)"
+        ))
+
+    pd.DataFrame({"version": [version]}).to_sql(
+        "attrition_data_version", engine, if_exists="replace", index=False
+    )
+
+
+def high_risk_employees(department=None, limit=50, version=None):
+    """
+    The `limit` highest-probability High-risk employees (optionally of one
+    department) as result rows with employee_id, department and
+    attrition_probability attributes, or None when the table does not
+    mirror `version` of attrition_data.parquet.
+    """
+    sql = (
+        "SELECT employee_id, department, attrition_probability "
+        "FROM attrition_data WHERE attrition_probability >= :high"
+    )
+    params = {"high": HIGH_RISK_THRESHOLD, "limit": int(limit)}
+    if department:
+        sql += " AND department = :department"
+        params["department"] = department
+    sql += " ORDER BY attrition_probability DESC, employee_id LIMIT :limit"
+
+    with get_engine().connect() as conn:
+        mirrored = conn.execute(text("SELECT version FROM attrition_data_version")).scalar()
+        if mirrored is None or mirrored != version:
+            return None
+        return conn.execute(text(sql), params).all()
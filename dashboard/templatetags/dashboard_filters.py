@@ -1,4 +1,6 @@
 from django import template
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
 
 register = template.Library()
 
@@ -9,3 +11,20 @@ def mul(value, arg):
         return float(value) * float(arg)
     except:
         return 0
+
+@register.simple_tag
+def plotly_chart(payload, chart_id):
+    """Render a chart payload from analytics.plotly_utils with Plotly.newPlot"""
+    if not payload:
+        return ""
+    # payload is already escaped for <script> by to_chart_json
+    return format_html(
+        '<div id="{0}" class="plotly-graph-div" style="height:100%; width:100%;"></div>'
+        '<script type="application/json" id="{0}-data">{1}</script>'
+        '<script>(function () {{'
+        ' var p = JSON.parse(document.getElementById("{0}-data").textContent);'
+        ' Plotly.newPlot("{0}", p.figure.data, p.figure.layout, p.config);'
+        ' }})();</script>',
+        chart_id,
+        mark_safe(payload),
+    )
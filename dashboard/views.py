@@ -1,41 +1,434 @@
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from time import time_ns
+from uuid import uuid4
 
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
 from django.http import JsonResponse
 from django.shortcuts import redirect, render
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_page
+from django.views.decorators.vary import vary_on_cookie
+from sqlalchemy.exc import SQLAlchemyError
 
 # ETL
-from analytics.etl import run_etl_pipeline
+from analytics import charts, queries
+from analytics.etl import DTYPES, HIGH_RISK_THRESHOLD, run_etl_pipeline
 # Plotly utilities
-from analytics.plotly_utils import (create_department_productivity_chart,
-                                    create_department_risk_chart,
-                                    create_department_satisfaction_chart,
-                                    create_employee_time_chart,
-                                    create_hours_heatmap,
-                                    create_productivity_chart,
-                                    create_risk_distribution_chart,
-                                    create_survey_breakdown_chart)
-
-# Helper - Load processed CSVs
-
-def get_data(name):
+from analytics.plotly_utils import create_employee_time_chart
+
+# Same locations as analytics.etl (resolved once, not per request)
+PROCESSED_DIR = os.path.join(settings.BASE_DIR, "data", "processed")
+RAW_DIR = os.path.join(settings.BASE_DIR, "data", "raw")
+
+# Rows shown in the attrition dashboard's high-risk table (?limit= overrides)
+HIGH_RISK_TABLE_LIMIT = 50
+
+# Columns the templates actually render; tables are projected to these
+# before being turned into template rows.
+TEMPLATE_COLS_ATTRITION = ["employee_id", "department", "attrition_probability"]
+TEMPLATE_COLS_PROJECTS = [
+    "project_id",
+    "project_type",
+    "priority",
+    "start_date",
+    "planned_end_date",
+    "actual_end_date",
+    "is_completed",
+    "on_time",
+]
+
+# Columns the views use from each dataset. Anything else in the file is
+# skipped at parse time (column projection for Parquet, usecols for CSV).
+USECOLS = {
+    "attrition_data": ["employee_id", "department", "attrition_probability", "risk_level"],
+    "weekly_time": [
+        "employee_id",
+        "year",
+        "week",
+        "year_week",
+        "hours_logged",
+        "productivity_ratio",
+        "activity_percentage",
+    ],
+    "employees": [
+        "employee_id",
+        "department",
+        "job_level",
+        "hire_date",
+        "years_experience",
+        "manager_id",
+        "performance_score_last_review",
+        "satisfaction_score",
+        "work_life_balance_score",
+        "communication_score",
+        "training_completed",
+    ],
+    "project_data": ["employee_id", *TEMPLATE_COLS_PROJECTS],
+    "survey_responses": ["employee_id", "question", "numeric_response"],
+    "time_tracking": ["employee_id", "date", "hours_logged", "billable_hours", "meeting_hours"],
+}
+
+# Helper - Load processed data
+
+# path (or derived key) -> (mtime, parsed object). One entry per key, so a
+# rewritten file replaces its stale frame instead of piling up next to it.
+_DATA_CACHE = {}
+
+
+def _memo(key, mtime, build):
+    """Return the cached value for `key` if its mtime matches, else build it."""
+    cached = _DATA_CACHE.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    value = build()
+    _DATA_CACHE[key] = (mtime, value)
+    return value
+
+
+def _parse(path):
+    if path.endswith(".json"):
+        with open(path) as f:
+            return json.load(f)
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    usecols = USECOLS.get(name)
+
+    if path.endswith(".parquet"):
+        # Only read the column chunks we need (missing ones are skipped)
+        if usecols is not None:
+            available = pq.read_schema(path).names
+            usecols = [c for c in usecols if c in available]
+        return pd.read_parquet(path, engine="pyarrow", columns=usecols)
+
+    # CSVs get the same dtypes as the ETL's raw reads and only the columns
+    # the views use (columns absent from the file are simply skipped).
+    return pd.read_csv(
+        path,
+        dtype=DTYPES.get(name),
+        usecols=(lambda c: c in usecols) if usecols else None,
+        memory_map=True,
+    )
+
+
+def _with_categorical_department(data):
+    """Every view filters/groups on department: make it categorical once, at load."""
+    if isinstance(data, pd.DataFrame) and "department" in data.columns:
+        if not isinstance(data["department"].dtype, pd.CategoricalDtype):
+            data["department"] = data["department"].astype("category")
+    return data
+
+
+def _load(path, mtime):
+    """Parse a processed file, reusing the cached result while `mtime` matches."""
+    return _memo(path, mtime, lambda: _with_categorical_department(_parse(path)))
+
+
+def _load_indexed(path, mtime, index_col, order_by=None):
+    """
+    `_load` with `index_col` as a sorted index (column kept). Rows sharing
+    an index value are kept in `order_by` order when that column exists.
+    """
+    def build():
+        df = _load(path, mtime)
+        if order_by is not None and order_by in df.columns:
+            df = df.sort_values(order_by, kind="stable")
+        return df.set_index(index_col, drop=False).sort_index(kind="stable")
+
+    return _memo((path, "index", index_col, order_by), mtime, build)
+
+
+def get_data(name, index_col=None, order_by=None):
     """
-    Load a processed CSV from data/processed using an absolute path
+    Load a processed dataset from data/processed using an absolute path
     so it matches analytics.etl.run_etl_pipeline.
+
+    Prefers `{name}.parquet` (what the ETL writes), then `{name}.csv`,
+    then the raw input `data/raw/{name}.csv` (raw datasets such as
+    employees are read in place rather than copied by the ETL).
+    Parsed frames are cached per path and reused while the file's mtime
+    is unchanged, so a rewritten file is picked up automatically. The
+    returned frame is shared between requests - callers must not mutate
+    it in place.
+
+    With `index_col`, the frame is returned indexed (and sorted) by that
+    column so single-key lookups can use `.loc` instead of a full scan;
+    `order_by` additionally orders the rows within each key once, at
+    index time, instead of on every lookup.
     """
-    base_dir = settings.BASE_DIR  
-    processed_dir = os.path.join(base_dir, "data", "processed")
-    path = os.path.join(processed_dir, f"{name}.csv")
+    found = _find(name)
+    if found is None:
+        return None
+
+    if index_col is not None:
+        return _load_indexed(*found, index_col, order_by)
+
+    return _load(*found)
+
+
+@lru_cache(maxsize=None)
+def _candidates(name, exts):
+    """Paths that may back dataset `name`, in lookup order."""
+    candidates = [os.path.join(PROCESSED_DIR, f"{name}.{ext}") for ext in exts]
+    if "csv" in exts:
+        candidates.append(os.path.join(RAW_DIR, f"{name}.csv"))
+    return tuple(candidates)
+
+
+def _find(name, exts=("parquet", "csv")):
+    """Return (path, mtime) of the file backing dataset `name`, or None."""
+    # One stat per candidate, doubling as the existence check
+    for path in _candidates(name, exts):
+        try:
+            return path, os.stat(path).st_mtime
+        except FileNotFoundError:
+            continue
+
+    return None
+
+
+def _departments(path, mtime):
+    return _memo(
+        (path, "departments"),
+        mtime,
+        lambda: tuple(_load(path, mtime)["department"].cat.categories.tolist()),
+    )
+
+
+def get_departments():
+    """
+    Department names for the filter dropdowns: from the ETL's kpis.json
+    snapshot, else from the employees file (memoized per file).
+    """
+    snapshot = _find("kpis", exts=("json",))
+    if snapshot is not None:
+        departments = _load(*snapshot).get("departments_list")
+        if departments is not None:
+            return list(departments)
+
+    found = _find("employees")
+    if found is None:
+        return []
+
+    return list(_departments(*found))
+
+
+def _dept_index(path, mtime):
+    def build():
+        employees = _load(path, mtime)
+        return {
+            dept: group["employee_id"].to_numpy()
+            for dept, group in employees.groupby("department", observed=True)
+        }
+
+    return _memo((path, "dept_index"), mtime, build)
+
 
-    if not os.path.exists(path):
+def get_department_map():
+    """employee_id -> department Series, built once per employees file."""
+    found = _find("employees")
+    if found is None:
         return None
 
-    return pd.read_csv(path)
+    path, mtime = found
+    return _memo(
+        (path, "department_map"),
+        mtime,
+        lambda: charts.department_map(_load(path, mtime)),
+    )
+
+
+def get_dept_emp_ids(department):
+    """
+    employee_id values of `department` as an ndarray, looked up in an index
+    built once per employees file. Unknown departments give an empty array;
+    None means there is no employees file to filter against.
+    """
+    found = _find("employees")
+    if found is None:
+        return None
+
+    emp_ids = _dept_index(*found).get(department)
+    return emp_ids if emp_ids is not None else np.empty(0, dtype=object)
+
+
+def _template_records(df, cols):
+    """
+    Rows of `df` restricted to the `cols` that exist in it, as namedtuples
+    (templates read `row.col` as with dicts, without a dict per row).
+    """
+    return list(df[[c for c in cols if c in df.columns]].itertuples(index=False, name="Row"))
+
+
+def get_kpis(department=None):
+    """
+    KPIs precomputed by the ETL: the overall snapshot (kpis.json), or the
+    `department` row of kpis_by_dept. Missing values come back as None and
+    a missing file as {}.
+    """
+    if not department:
+        found = _find("kpis", exts=("json",))
+        return dict(_load(*found)) if found is not None else {}
+
+    found = _find("kpis_by_dept")
+    if found is None:
+        return {}
+
+    def build():
+        by_dept = _load(*found)
+        row = by_dept[by_dept["department"] == department]
+        if row.empty:
+            return {}
+        return {k: None if pd.isna(v) else v for k, v in row.to_dict("records")[0].items()}
+
+    return dict(_memo_department((found[0], "kpis"), department, found[1], build))
+
+
+def _memo_department(key, department, mtime, build):
+    """
+    `_memo` for a per-department value, keyed by (*key, department). Only
+    departments offered by get_departments() are cached, so arbitrary
+    ?department= values cannot grow the cache; others are built each time.
+    """
+    if department and department not in get_departments():
+        return build()
+    return _memo((*key, department), mtime, build)
+
+
+def _mtimes(*names):
+    """mtimes of the files backing `names` (None for a missing dataset)."""
+    return tuple(found[1] if found is not None else None for found in map(_find, names))
+
+
+def _aggregate(kind, department, names, build):
+    """
+    Memoize a per-department aggregate derived from the datasets `names`;
+    it is rebuilt when any of their files changes.
+    """
+    return _memo_department((kind,), department, _mtimes(*names), build)
+
+
+def _department_rows(name, department):
+    """
+    Rows of dataset `name` belonging to `department` (the whole frame when
+    no department is selected), filtered once and memoized.
+    """
+    df = get_data(name)
+    if not department or df is None:
+        return df
+
+    def build():
+        emp_ids = get_dept_emp_ids(department)
+        return df if emp_ids is None else _only_employees(df, emp_ids)
+
+    return _aggregate(("rows", name), department, (name, "employees"), build)
+
+
+def _question_scores(department):
+    """Mean score per survey question, for the engagement table."""
+    def build():
+        survey = _department_rows("survey_responses", department)
+        if survey is None or survey.empty:
+            return None
+        return charts.question_scores(survey)
+
+    return _aggregate(
+        "question_scores", department,
+        ("employees", "survey_responses"), build,
+    )
+
+
+def _read_text(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _page_charts(names, department, build):
+    """
+    Payloads of the charts `names` as pre-rendered by the ETL (an empty
+    file means nothing to plot, i.e. None). Falls back to `build()` when
+    any of them is missing, e.g. for a department the ETL has not seen or
+    output written before charts were pre-rendered (or removed by an ETL
+    run in progress).
+    """
+    payloads = {}
+    for name in names:
+        path = str(charts.chart_path(name, department))
+        try:
+            mtime = os.stat(path).st_mtime
+            payloads[name] = _memo(path, mtime, lambda: _read_text(path)) or None
+        except FileNotFoundError:
+            return build()
+
+    return payloads
+
+
+def _only_employees(df, emp_ids):
+    """Rows of `df` whose employee_id is in `emp_ids`; None passes through."""
+    if df is None:
+        return None
+    return df[df["employee_id"].isin(emp_ids)]
+
+
+def clear_data_cache():
+    """Drop every cached frame (e.g. after the ETL has rewritten data/processed)."""
+    _DATA_CACHE.clear()
+
+
+# Rendered dashboard pages
+
+# Cache key holding the version of the current ETL output. Page cache
+# keys are prefixed with it, so bumping it makes every cached page stale.
+ETL_VERSION_KEY = "etl_version"
+
+
+def bump_etl_version():
+    """Invalidate all cached dashboard pages (call after the ETL has run)."""
+    cache.set(ETL_VERSION_KEY, time_ns(), None)
+
+
+def cache_dashboard(view):
+    """
+    Cache the rendered page per user (session cookie) and full URL, so the
+    ?department= filter gets its own entry, until the next ETL run.
+
+    Only the server keeps a copy: responses go out as private/no-cache so
+    browsers revalidate and see the new pages right after an ETL run.
+    """
+    view = vary_on_cookie(view)
+    cached_views = {}  # ETL version -> cache_page-wrapped view
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        version = cache.get(ETL_VERSION_KEY, 0)
+        cached_view = cached_views.get(version)
+        if cached_view is None:
+            cached_view = cache_page(
+                settings.DASHBOARD_CACHE_SECONDS, key_prefix=f"etl{version}"
+            )(view)
+            cached_views.clear()
+            cached_views[version] = cached_view
+
+        response = cached_view(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_cache=True, max_age=0)
+        if response.has_header("Expires"):
+            del response["Expires"]
+        return response
+
+    return wrapped
 
 def get_attrition_stats():
     """Return (high_risk_count, high_risk_pct) using ONE consistent formula."""
@@ -61,11 +454,15 @@ def signup(request):
             messages.error(request, "Passwords do not match")
             return redirect("signup")
 
-        if User.objects.filter(username=username).exists():
+        # One INSERT; the unique constraint on username rejects duplicates
+        # (including concurrent signups) instead of a separate exists() query.
+        try:
+            with transaction.atomic():
+                User.objects.create_user(username=username, email=email, password=pw1)
+        except IntegrityError:
             messages.error(request, "Username already exists")
             return redirect("signup")
 
-        User.objects.create_user(username=username, email=email, password=pw1)
         return redirect("login")
 
     return render(request, "signup.html")
@@ -79,36 +476,23 @@ def logout_view(request):
 # HOME DASHBOARD
 
 @login_required
+@cache_dashboard
 def dashboard_home(request):
 
-    employees = get_data("employees")
-    projects = get_data("project_data")
-    satisfaction = get_data("employee_satisfaction")
-    attrition = get_data("attrition_data")
+    # KPIs are precomputed by the ETL (kpis.json)
+    kpis = get_kpis()
 
     # ---- basic KPIs ----
     context = {
-        "employee_count": len(employees) if employees is not None else 0,
-        "departments": employees["department"].nunique() if employees is not None else 0,
-        "avg_satisfaction": round(satisfaction["avg_satisfaction"].mean(), 2)
-                            if satisfaction is not None else 0,
-        "active_projects": projects[projects["is_completed"] == 0]["project_id"].nunique()
-                            if projects is not None else 0,
+        "employee_count": kpis.get("employee_count", 0),
+        "departments": kpis.get("departments", 0),
+        "avg_satisfaction": round(kpis.get("avg_satisfaction") or 0, 2),
+        "active_projects": kpis.get("active_projects", 0),
+        # High risk = attrition_probability >= 0.55 (same as attrition dashboard)
+        "high_risk_pct": kpis.get("high_risk_pct", 0.0),
+        "departments_list": get_departments(),
     }
 
-    # ---- unified HIGH RISK % (same logic as attrition dashboard) ----
-    high_risk_pct = 0.0
-    if attrition is not None and not attrition.empty:
-        # High risk = attrition_probability >= 0.55
-        high_risk_df = attrition[attrition["attrition_probability"] >= 0.55]
-        if len(attrition) > 0:
-            high_risk_pct = round(len(high_risk_df) / len(attrition) * 100, 1)
-
-    context["high_risk_pct"] = high_risk_pct
-
-    if employees is not None:
-        context["departments_list"] = employees["department"].unique().tolist()
-
     return render(request, "dashboard/home.html", context)
 
 
@@ -116,46 +500,26 @@ def dashboard_home(request):
 # PRODUCTIVITY DASHBOARD
 
 @login_required
+@cache_dashboard
 def productivity_dashboard(request):
 
-    employees = get_data("employees")
-    weekly = get_data("weekly_time")
-    projects = get_data("project_data")
-
     department = request.GET.get("department")
 
-    # Filter by department
-    if department and employees is not None:
-        emp_ids = employees[employees["department"] == department]["employee_id"].tolist()
-        weekly = weekly[weekly["employee_id"].isin(emp_ids)]
-        projects = projects[projects["employee_id"].isin(emp_ids)]
-
-    # KPIs
-    avg_productivity = round(weekly["productivity_ratio"].mean() * 100, 1) if weekly is not None else 0
-    avg_hours = round(weekly["hours_logged"].mean(), 1) if weekly is not None else 0
-    project_completion = round(projects["is_completed"].mean() * 100, 1) if projects is not None else 0
-    on_time_rate = round(projects["on_time"].mean() * 100, 1) if projects is not None else 0
-
-    # Charts
-    productivity_trend = None
-    productivity_by_dept = None
-    heatmap_html = None
-
-    if weekly is not None and not weekly.empty:
-
-        df = weekly.copy()
-        df["week_year"] = df["year"].astype(str) + "-W" + df["week"].astype(str)
-
-        # Trend
-        productivity_trend = create_productivity_chart(df)
-
-        # Productivity by department
-        merged = weekly.merge(employees[["employee_id", "department"]], on="employee_id")
-        dept_df = merged.groupby("department")["productivity_ratio"].mean().reset_index()
-        productivity_by_dept = create_department_productivity_chart(dept_df)
-
-        # Heatmap
-        heatmap_html = create_hours_heatmap(weekly)
+    # KPIs (precomputed by the ETL, per department when filtered)
+    kpis = get_kpis(department)
+    avg_productivity = round((kpis.get("avg_productivity") or 0) * 100, 1)
+    avg_hours = round(kpis.get("avg_hours") or 0, 1)
+    project_completion = round((kpis.get("project_completion") or 0) * 100, 1)
+    on_time_rate = round((kpis.get("on_time_rate") or 0) * 100, 1)
+
+    # Charts (pre-rendered by the ETL)
+    page_charts = _page_charts(
+        charts.PRODUCTIVITY_CHARTS,
+        department,
+        lambda: charts.productivity_charts(
+            _department_rows("weekly_time", department), get_department_map()
+        ),
+    )
 
     context = {
         "avg_productivity": avg_productivity,
@@ -164,12 +528,12 @@ def productivity_dashboard(request):
         "on_time_rate": on_time_rate,
 
         # charts
-        "productivity_trend": productivity_trend,
-        "productivity_by_department": productivity_by_dept,
-        "heatmap_plot": heatmap_html,
+        "productivity_trend": page_charts["productivity_trend"],
+        "productivity_by_department": page_charts["productivity_by_department"],
+        "heatmap_plot": page_charts["hours_heatmap"],
 
         # filters
-        "departments_list": employees["department"].unique().tolist() if employees is not None else [],
+        "departments_list": get_departments(),
         "selected_department": department,
     }
 
@@ -180,62 +544,33 @@ def productivity_dashboard(request):
 # ENGAGEMENT DASHBOARD
 
 @login_required
+@cache_dashboard
 def engagement_dashboard(request):
 
-    employees = get_data("employees")
-    satisfaction = get_data("employee_satisfaction")
-    survey = get_data("survey_responses")
-
     department = request.GET.get("department")
 
-    if department and employees is not None:
-        emp_ids = employees[employees["department"] == department]["employee_id"].tolist()
-        if satisfaction is not None:
-            satisfaction = satisfaction[satisfaction["employee_id"].isin(emp_ids)]
-        if survey is not None:
-            survey = survey[survey["employee_id"].isin(emp_ids)]
-
-    # --- KPI ---
-    avg_satisfaction = 0
-    if satisfaction is not None and not satisfaction.empty and "avg_satisfaction" in satisfaction.columns:
-        avg_satisfaction = round(satisfaction["avg_satisfaction"].mean(), 2)
-
-    # --- Department satisfaction chart ---
-    dept_sat_chart = None
-    if employees is not None and satisfaction is not None:
-        
-        dept_df = employees.merge(
-            satisfaction[["employee_id", "avg_satisfaction"]],
-            on="employee_id",
-            how="left"
-        )
-        # group by department
-        dept_df = (
-            dept_df.groupby("department")["avg_satisfaction"]
-            .mean()
-            .reset_index()
-            .dropna()
-        )
-        if not dept_df.empty:
-            dept_sat_chart = create_department_satisfaction_chart(dept_df)
-
-    # --- Survey breakdown chart ---
-    survey_plot = None
-    question_scores = None
-    if survey is not None and not survey.empty:
-        question_scores = (
-            survey.groupby("question")["numeric_response"]
-            .mean()
-            .reset_index()
-        )
-        survey_plot = create_survey_breakdown_chart(question_scores)
+    # --- KPI (precomputed by the ETL) ---
+    avg_satisfaction = round(get_kpis(department).get("avg_satisfaction") or 0, 2)
+
+    # --- Department satisfaction and survey breakdown charts (pre-rendered by the ETL) ---
+    page_charts = _page_charts(
+        charts.ENGAGEMENT_CHARTS,
+        department,
+        lambda: charts.engagement_charts(
+            get_department_map(),
+            _department_rows("employee_satisfaction", department),
+            _department_rows("survey_responses", department),
+        ),
+    )
+
+    question_scores = _question_scores(department)
 
     context = {
         "avg_satisfaction": avg_satisfaction,
-        "survey_plot": survey_plot,
+        "survey_plot": page_charts["survey_breakdown"],
         "question_scores": question_scores.to_dict("records") if question_scores is not None else None,
-        "department_chart": dept_sat_chart,
-        "departments_list": employees["department"].unique().tolist() if employees is not None else [],
+        "department_chart": page_charts["department_satisfaction"],
+        "departments_list": get_departments(),
         "selected_department": department,
     }
 
@@ -246,9 +581,9 @@ def engagement_dashboard(request):
 # ATTRITION DASHBOARD
 
 @login_required
+@cache_dashboard
 def attrition_dashboard(request):
 
-    employees = get_data("employees")
     attrition = get_data("attrition_data")  # from ETL
 
     if attrition is None or attrition.empty:
@@ -256,39 +591,15 @@ def attrition_dashboard(request):
 
     department = request.GET.get("department")
 
-    # Filter by department (if selected)
-    if department:
-        attrition = attrition[attrition["department"] == department]
-
-    # ------------- DEFINE RISK BUCKETS FROM PROBABILITY -------------
-    # We ignore any existing 'risk_level' column in CSV and compute from attrition_probability
-    def bucket(p):
-        if p >= 0.55:
-            return "High"
-        elif p >= 0.35:
-            return "Medium"
-        else:
-            return "Low"
-
-    attrition["risk_level_bucket"] = attrition["attrition_probability"].apply(bucket)
-
-    # High risk employees = probability >= 0.55
-    high_risk_df = attrition[attrition["attrition_probability"] >= 0.55]
-
-    high_risk_count = len(high_risk_df)
-    high_risk_pct = 0.0
-    if len(attrition) > 0:
-        high_risk_pct = round(high_risk_count / len(attrition) * 100, 1)
-
-    # ------------- RISK DISTRIBUTION PIE -------------
-    risk_dist = (
-        attrition["risk_level_bucket"]
-        .value_counts()
-        .reindex(["Low", "Medium", "High"], fill_value=0)
-        .reset_index()
-    )
-    risk_dist.columns = ["Risk Level", "Count"]
-    risk_plot = create_risk_distribution_chart(risk_dist)
+    # KPIs and risk bucket counts (precomputed by the ETL, per department when filtered)
+    kpis = get_kpis(department)
+    high_risk_count = kpis.get("high_risk_count", 0)
+    high_risk_pct = kpis.get("high_risk_pct", 0.0)
+
+    # ------------- RISK DISTRIBUTION PIE (pre-rendered by the ETL) -------------
+    risk_plot = _page_charts(
+        charts.ATTRITION_CHARTS, department, lambda: charts.attrition_charts(kpis)
+    )["risk_distribution"]
 
     # ------------- (OPTIONAL) DEPARTMENT RISK BAR – you said OK to remove -------------
     dept_risk_plot = None
@@ -296,14 +607,32 @@ def attrition_dashboard(request):
     # and the template will show the fallback image or nothing depending on your HTML.
 
     # ------------- HIGH RISK EMPLOYEES TABLE -------------
-    # Keep only needed columns so job level, tenure and risk score show correctly.
-    cols = ["employee_id", "department", "job_level", "tenure", "attrition_probability"]
-    existing_cols = [c for c in cols if c in high_risk_df.columns]
-    high_risk_employees = (
-        high_risk_df[existing_cols]
-        .sort_values("attrition_probability", ascending=False)
-        .to_dict("records")
-    )
+    # Top `limit` rows straight from the analytics DB (ORDER BY ... LIMIT),
+    # with only the columns the template renders.
+    try:
+        limit = max(int(request.GET.get("limit", HIGH_RISK_TABLE_LIMIT)), 1)
+    except ValueError:
+        limit = HIGH_RISK_TABLE_LIMIT
+
+    # Only while the mirror was written from the current attrition_data
+    # file; a missing, unreachable or stale mirror (e.g. after an ETL run
+    # without sql_engine) gives the same rows from the cached frame.
+    found = _find("attrition_data")
+    try:
+        high_risk_employees = queries.high_risk_employees(
+            department, limit, version=found and found[1]
+        )
+    except SQLAlchemyError:
+        high_risk_employees = None
+
+    if high_risk_employees is None:
+        high_risk = attrition[attrition["attrition_probability"] >= HIGH_RISK_THRESHOLD]
+        if department:
+            high_risk = high_risk[high_risk["department"] == department]
+        high_risk_employees = _template_records(
+            high_risk.nlargest(limit, "attrition_probability"),
+            TEMPLATE_COLS_ATTRITION,
+        )
 
     context = {
         "high_risk_count": high_risk_count,
@@ -311,8 +640,7 @@ def attrition_dashboard(request):
         "risk_plot": risk_plot,
         "dept_risk_plot": dept_risk_plot,
         "high_risk_employees": high_risk_employees,
-        "departments_list": employees["department"].unique().tolist()
-                            if employees is not None else [],
+        "departments_list": get_departments(),
         "selected_department": department,
     }
 
@@ -323,59 +651,44 @@ def attrition_dashboard(request):
 # EMPLOYEE DETAIL PAGE
 
 @login_required
+@cache_dashboard
 def employee_detail(request, employee_id):
 
-    employees = get_data("employees")
-    time = get_data("time_tracking")
-    projects = get_data("project_data")
-    attrition = get_data("attrition_data")
+    # Indexed by employee_id: each lookup below is an index probe, not a scan
+    employees = get_data("employees", index_col="employee_id")
+    time = get_data("time_tracking", index_col="employee_id", order_by="date")
+    projects = get_data("project_data", index_col="employee_id")
+    attrition = get_data("attrition_data", index_col="employee_id")
 
     # ---- If employee does not exist in employees table ----
-    if employees is None or employee_id not in employees["employee_id"].values:
+    if employees is None or employee_id not in employees.index:
         return render(request, "dashboard/employee_detail.html", {"not_found": True})
 
     # Basic employee info
-    employee = employees[employees["employee_id"] == employee_id].iloc[0].to_dict()
+    employee = employees.loc[[employee_id]].iloc[0].to_dict()
 
     # ---------------- TIME CHART ----------------
     time_plot = None
-    emp_time = time[time["employee_id"] == employee_id] if time is not None else None
-    if emp_time is not None and not emp_time.empty:
-        emp_time = emp_time.sort_values("date")
+    if time is not None and employee_id in time.index:
+        emp_time = time.loc[[employee_id]]  # already in date order
         time_plot = create_employee_time_chart(emp_time)
 
     # ---------------- PROJECTS ----------------
     emp_projects = None
-    if projects is not None:
-        emp_projects = projects[projects["employee_id"] == employee_id]
+    if projects is not None and employee_id in projects.index:
+        emp_projects = projects.loc[[employee_id]]
 
-    # ---------------- ATTRITION (RE-COMPUTE RISK LEVEL) ----------------
+    # ---------------- ATTRITION ----------------
+    # risk_level is bucketed by the ETL with the same cut-offs as attrition_dashboard
     emp_attr = None
-    if attrition is not None and not attrition.empty:
-        emp_attr_df = attrition[attrition["employee_id"] == employee_id]
-
-        if not emp_attr_df.empty:
-            row = emp_attr_df.iloc[0].copy()
-
-            # Get probability safely
-            p = float(row.get("attrition_probability", 0.0))
-
-            # Same buckets as attrition_dashboard
-            if p >= 0.55:
-                level = "High"
-            elif p >= 0.35:
-                level = "Medium"
-            else:
-                level = "Low"
-
-            # Overwrite / ensure consistent field
-            row["risk_level"] = level
-            emp_attr = row.to_dict()
+    if attrition is not None and employee_id in attrition.index:
+        emp_attr = attrition.loc[[employee_id]].iloc[0].to_dict()
 
     context = {
         "employee": employee,
         "time_plot": time_plot,
-        "projects": emp_projects.to_dict("records") if emp_projects is not None else None,
+        "projects": _template_records(emp_projects, TEMPLATE_COLS_PROJECTS)
+                    if emp_projects is not None else None,
         "attrition_data": emp_attr,
     }
 
@@ -385,13 +698,46 @@ def employee_detail(request, employee_id):
 
 # RUN ETL PAGE
 
+# The pipeline runs on one background thread so the request returns at
+# once; the lock guards _ETL_JOB and ensures a single run at a time (per
+# process - several workers would each accept one run).
+_ETL_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="etl")
+_ETL_LOCK = threading.Lock()
+_ETL_JOB = {"job_id": None, "status": "idle", "message": ""}
+
+
+def _run_etl_job(job_id):
+    try:
+        run_etl_pipeline(sql_engine=queries.get_engine())
+        clear_data_cache()
+        bump_etl_version()
+        status, message = "success", "ETL completed successfully"
+    except Exception as e:
+        status, message = "error", str(e)
+
+    with _ETL_LOCK:
+        if _ETL_JOB["job_id"] == job_id:
+            _ETL_JOB.update(status=status, message=message)
+
+
 @login_required
 def run_etl(request):
     if request.method == "POST":
-        try:
-            run_etl_pipeline()
-            return JsonResponse({"status": "success", "message": "ETL completed successfully"})
-        except Exception as e:
-            return JsonResponse({"status": "error", "message": str(e)})
+        with _ETL_LOCK:
+            if _ETL_JOB["status"] == "running":
+                return JsonResponse({"status": "running", "job_id": _ETL_JOB["job_id"]})
+
+            job_id = uuid4().hex
+            _ETL_JOB.update(job_id=job_id, status="running", message="")
+
+        _ETL_EXECUTOR.submit(_run_etl_job, job_id)
+        return JsonResponse({"status": "started", "job_id": job_id})
 
     return render(request, "dashboard/run_etl.html")
+
+
+@login_required
+def run_etl_status(request):
+    """State of the latest ETL run: idle, running, success or error."""
+    with _ETL_LOCK:
+        return JsonResponse(dict(_ETL_JOB))
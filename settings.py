@@ -84,6 +84,18 @@ ANALYTICS_DB = os.environ.get(
     "sqlite:///hr_analytics.db"
 )
 
+# CACHE (rendered dashboard pages, see dashboard.views.cache_dashboard)
+# LocMemCache is per process; use a shared backend (e.g. Redis) when
+# running several workers so an ETL run invalidates all of them.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+DASHBOARD_CACHE_SECONDS = 60 * 15
+
 # PASSWORD VALIDATION
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -101,6 +113,16 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# PASSWORD HASHING
+# Argon2 (argon2-cffi) for new hashes; the PBKDF2 hashers stay listed so
+# existing passwords still verify and are upgraded on the next login.
+
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
 # INTERNATIONALIZATION
 
 LANGUAGE_CODE = "en-us"
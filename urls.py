@@ -20,5 +20,8 @@ urlpatterns = [
     path("engagement/", views.engagement_dashboard, name="engagement_dashboard"),
     path("attrition/", views.attrition_dashboard, name="attrition_dashboard"),
     path("employee/<str:employee_id>/", views.employee_detail, name="employee_detail"),
+
+    path("run-etl/", views.run_etl, name="run_etl"),
+    path("run-etl/status/", views.run_etl_status, name="run_etl_status"),
 ]
 